@@ -1,10 +1,12 @@
 """Build Community models."""
 
 import biom
+import numpy as np
 import os
 import micom.workflows as mw
-from micom.taxonomy import build_from_qiime
 import pandas as pd
+import re
+from scipy.sparse import csr_matrix
 from q2_micom._formats_and_types import (
     JSONDirectory,
     CommunityModelDirectory,
@@ -22,6 +24,82 @@ RANKS = [
     "strain",
 ]
 
+BRACKETS = {ord("["): None, ord("]"): None}
+RANK_PREFIX = re.compile(r"[\w_]+__")
+
+try:
+    import pyarrow  # noqa: F401
+
+    STR_DTYPE = pd.api.types.pandas_dtype("string[pyarrow]")
+except (ImportError, TypeError):
+    STR_DTYPE = object
+
+
+def build_from_qiime(
+    abundance: biom.Table,
+    taxonomy: pd.Series,
+    collapse_on="genus",
+    cutoff: float = 0.0,
+) -> pd.DataFrame:
+    """Build a MICOM taxonomy from Qiime 2 data.
+
+    Faster version of `micom.taxonomy.build_from_qiime` that collapses the
+    feature table by multiplying the sparse count matrix with a group
+    indicator matrix rather than calling `biom.Table.collapse`, which runs
+    a Python callback for every observation.
+    """
+    taxa = taxonomy.str.translate(BRACKETS).str.replace(
+        RANK_PREFIX, "", regex=True
+    )
+    taxa = taxa.str.split(";\\s*", expand=True).replace("", None)
+    taxa.columns = RANKS[0:taxa.shape[1]]
+    taxa = taxa.astype(STR_DTYPE)
+    taxa["taxid"] = taxonomy.index
+
+    if isinstance(collapse_on, str):
+        collapse_on = [collapse_on]
+
+    ranks = [r for r in collapse_on if r in taxa.columns]
+    mapping = taxa[ranks[0]].fillna("None").astype(str)
+    for r in ranks[1:]:
+        mapping = mapping.str.cat(taxa[r].astype(str), sep="|", na_rep="None")
+    taxa["mapping_ranks"] = mapping
+
+    mat = abundance.matrix_data.tocsr()
+    obs_ids = abundance.ids("observation")
+    groups = pd.Categorical(taxa.loc[obs_ids, "mapping_ranks"])
+    indicator = csr_matrix(
+        (np.ones(len(obs_ids)), (np.arange(len(obs_ids)), groups.codes)),
+        shape=(len(obs_ids), len(groups.categories)),
+    )
+    counts = (indicator.T @ mat).toarray()
+    relative = counts / counts.sum(axis=0)
+    keep = (relative > cutoff).any(axis=1)
+    counts, relative = counts[keep], relative[keep]
+    collapsed = pd.DataFrame(
+        counts.T,
+        index=abundance.ids("sample"),
+        columns=groups.categories[keep],
+    )
+    collapsed["sample_id"] = collapsed.index
+
+    abundance = collapsed.melt(
+        id_vars="sample_id", var_name="mapping_ranks", value_name="abundance"
+    )
+    abundance["relative"] = relative.ravel()
+    abundance = pd.merge(
+        abundance[abundance.abundance > 0.0],
+        taxa[ranks + ["mapping_ranks"]].drop_duplicates(),
+        on="mapping_ranks",
+    )
+    abundance["id"] = abundance["mapping_ranks"].replace(
+        r"[^A-Za-z0-9_]+", "_", regex=True
+    )
+    del abundance["mapping_ranks"]
+    abundance.dropna(subset=ranks, inplace=True)
+
+    return abundance
+
 
 def build_spec(
     abundance: biom.Table,
@@ -38,11 +116,21 @@ def build_spec(
         ranks = RANKS[0:rank_index]
     else:
         ranks = [rank]
-    model_files["file"] = model_files[rank].apply(
-        lambda i: str(models.json_files.path_maker(model_id=i))
+    model_folder = (
+        str(models.json_files.path_maker(model_id="blub"))
+        .replace("blub.json", "")
     )
+    model_files["file"] = model_folder + model_files[rank].astype(str) + ".json"
 
-    tax = build_from_qiime(abundance, taxonomy, collapse_on=ranks)
+    tax = build_from_qiime(
+        abundance, taxonomy, collapse_on=ranks, cutoff=cutoff
+    )
+    for r in ranks:
+        key_dtype = pd.CategoricalDtype(
+            pd.concat([model_files[r], tax[r]]).dropna().unique()
+        )
+        model_files[r] = model_files[r].astype(key_dtype)
+        tax[r] = tax[r].astype(key_dtype)
     micom_taxonomy = pd.merge(model_files, tax, on=ranks)
     micom_taxonomy = micom_taxonomy[micom_taxonomy.relative > cutoff]
     stats = micom_taxonomy.sample_id.value_counts().describe()
@@ -25,7 +25,7 @@ def grow(
         manifest, model_folder, medium, tradeoff, threads)
     growth.to_csv(out.growth_rates.path_maker(), index=False)
     annotations.to_csv(out.annotations.path_maker(), index=False)
-    exchanges[pd.notna(exchanges.flux)].to_csv(
-        out.exchange_fluxes.path_maker(), index=False
+    exchanges.to_csv(
+        out.exchange_fluxes.path_maker(), index=False, chunksize=1000000
     )
     return out
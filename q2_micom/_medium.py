@@ -1,8 +1,5 @@
 """Constructs a minimal medium for a set of community models."""
 
-from cobra.util.solver import OptimizationError
-from micom import load_pickle
-import micom.media as mm
 import micom.workflows as mw
 import pandas as pd
 from q2_micom._formats_and_types import CommunityModelDirectory
@@ -2,6 +2,7 @@
 
 import biom
 import micom
+import numpy as np
 import os.path as path
 import pandas as pd
 import qiime2 as q2
@@ -35,3 +36,27 @@ def test_build():
         assert isinstance(com, micom.Community)
         assert len(com.reactions) > 3 * 95
         assert len(com.abundances) == 3
+
+
+def test_build_from_qiime_unclassified():
+    tbl = biom.Table(
+        np.array([[10.0, 20.0], [5.0, 0.0], [1.0, 2.0]]),
+        ["F1", "F2", "F3"],
+        ["SA1", "SA2"],
+    )
+    lineage = (
+        "k__Bacteria; p__Firmicutes; c__Bacilli; o__Lactobacillales; "
+        "f__Enterococcaceae; g__Enterococcus"
+    )
+    taxonomy = pd.Series(
+        [lineage, "k__Bacteria; p__Firmicutes; c__Bacilli", lineage],
+        index=["F1", "F2", "F3"],
+    )
+    tax = q2m._build.build_from_qiime(tbl, taxonomy, collapse_on="genus")
+    tax = tax.set_index("sample_id")
+    assert tax.shape[0] == 2
+    assert (tax.genus == "Enterococcus").all()
+    assert tax.loc["SA1", "abundance"] == 11.0
+    assert tax.loc["SA2", "abundance"] == 22.0
+    assert tax.loc["SA1", "relative"] == 11.0 / 16.0
+    assert tax.loc["SA2", "relative"] == 1.0